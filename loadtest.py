@@ -0,0 +1,367 @@
+"""Нагрузочное тестирование Music Quiz.
+
+Поднимает локальную заглушку Deezer API и CDN, запускает N процессов приложения
+и имитирует игроков: регистрация и вход, /preload, /play, ответы, загрузка аудио
+через /proxy и чат через Socket.IO. В конце печатает пропускную способность,
+перцентили задержек, долю ошибок и потребление памяти каждым процессом.
+
+Пример:
+    python loadtest.py --players 50 --workers 2 --rounds 5
+"""
+import sys
+
+if __name__ == '__main__' and sys.argv[1:2] == ['worker']:
+    # Процесс приложения работает как под gunicorn с eventlet: патчим до остальных импортов
+    import eventlet
+    eventlet.monkey_patch()
+
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Процесс завершился при запуске: {url}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер не ответил за {timeout} сек: {url}")
+
+
+def read_memory(pid):
+    # Текущая и пиковая резидентная память процесса в МБ (Linux /proc)
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':', 1)
+                    memory[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return memory.get('VmRSS', 0.0), memory.get('VmHWM', 0.0)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def is_play_page(response):
+    return 'id="audio-player"' in response.text
+
+
+def is_answer(response):
+    try:
+        return 'correct' in response.json()
+    except ValueError:
+        return False
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failures = defaultdict(Counter)
+
+    def record(self, operation, elapsed, ok, reason=None):
+        with self.lock:
+            self.latencies[operation].append(elapsed)
+            if not ok:
+                self.errors[operation] += 1
+                self.failures[operation][reason or 'unknown'] += 1
+
+    def measure(self, operation, func, *args, expect=None, check=None, **kwargs):
+        # Причина ошибки: класс исключения, неожиданный HTTP-статус или непрошедшая проверка содержимого
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record(operation, time.perf_counter() - start, False, type(e).__name__)
+            return None
+        elapsed = time.perf_counter() - start
+        status = getattr(result, 'status_code', 200)
+        if result is None:
+            reason = 'no result'
+        elif (status != expect) if expect else (status >= 400):
+            reason = f"HTTP {status}"
+        elif check is not None and not check(result):
+            reason = 'content check'
+        else:
+            reason = None
+        self.record(operation, elapsed, reason is None, reason)
+        return None if reason else result
+
+
+class Player:
+    def __init__(self, base_url, stats, args):
+        self.base_url = base_url
+        self.stats = stats
+        self.args = args
+        self.http = requests.Session()
+        self.username = f"load_{uuid.uuid4().hex[:12]}"
+        self.password = uuid.uuid4().hex
+        self.sio = None
+        self.pending_message = None
+        self.message_received = threading.Event()
+
+    def request(self, operation, method, path, expect=None, check=None, **kwargs):
+        kwargs.setdefault('timeout', self.args.timeout)
+        return self.stats.measure(
+            operation, self.http.request, method, self.base_url + path, expect=expect, check=check, **kwargs
+        )
+
+    def think(self):
+        if self.args.think:
+            time.sleep(random.uniform(0, self.args.think))
+
+    def login(self):
+        credentials = {'username': self.username, 'password': self.password}
+        # При успехе оба маршрута перенаправляют, при ошибке заново отдают форму
+        if not self.request('register', 'POST', '/register', expect=302, data=credentials, allow_redirects=False):
+            return False
+        return self.request('login', 'POST', '/login', expect=302, data=credentials, allow_redirects=False) is not None
+
+    def open_chat(self):
+        # Браузер вызывает io() при каждой загрузке страницы, и handle_connect заново отправляет всю историю чата
+        import socketio
+
+        self.close_chat()
+        client = socketio.Client(reconnection=False)
+
+        @client.on('chat_message')
+        def on_chat_message(data):
+            if data.get('message') == self.pending_message:
+                self.message_received.set()
+
+        cookies = '; '.join(f"{name}={value}" for name, value in self.http.cookies.items())
+        if self.stats.measure(
+            'socket_connect', lambda: client.connect(
+                self.base_url, headers={'Cookie': cookies}, wait_timeout=self.args.timeout
+            ) or True
+        ):
+            self.sio = client
+
+    def close_chat(self):
+        if self.sio:
+            try:
+                self.sio.disconnect()
+            except Exception:
+                pass
+            self.sio = None
+
+    def send_chat(self):
+        self.pending_message = f"{self.username}: {uuid.uuid4().hex[:8]}"
+        self.message_received.clear()
+        start = time.perf_counter()
+        try:
+            self.sio.emit('send_message', {'message': self.pending_message})
+            ok = self.message_received.wait(self.args.timeout)
+            reason = None if ok else 'no broadcast'
+        except Exception as e:
+            ok = False
+            reason = type(e).__name__
+        self.stats.record('chat_message', time.perf_counter() - start, ok, reason)
+
+    def play_round(self, difficulty):
+        # При ошибке /play перенаправляет на главную или отдаёт index.html с кодом 200
+        self.request('play', 'GET', f"/play/{difficulty}", expect=200, check=is_play_page,
+                     params={'style': 'any'}, allow_redirects=False)
+        if self.args.chat:
+            self.open_chat()
+        self.think()
+        response = self.request('preload', 'GET', f"/preload/{difficulty}/any")
+        if not response:
+            return
+        data = response.json()
+        if not data.get('options'):
+            return
+        track = data['track']
+        self.request('proxy', 'GET', f"/proxy/{track['preview_url']}")
+        self.think()
+        guess = random.choice(data['options'])['id']
+        self.request('answer', 'POST', f"/play/{difficulty}", expect=200, check=is_answer,
+                     allow_redirects=False, data={
+                         'guess': guess,
+                         'track_id': track['id'],
+                         'track_title': track['title'],
+                         'track_artist': track['artist']
+                     })
+
+    def run(self):
+        if not self.login():
+            return
+        try:
+            for _ in range(self.args.rounds):
+                self.play_round(random.choice(self.args.difficulties))
+                if self.sio:
+                    self.send_chat()
+                self.think()
+        finally:
+            self.close_chat()
+            self.request('logout', 'GET', '/logout', expect=302, allow_redirects=False)
+
+
+def start_worker(port, env, log_dir):
+    log_path = os.path.join(log_dir, f"worker_{port}.log")
+    with open(log_path, 'wb') as log_file:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), 'worker', '--port', str(port)],
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log_file
+        )
+    try:
+        wait_ready(f"http://127.0.0.1:{port}/", process)
+    except RuntimeError as e:
+        process.terminate()
+        process.wait()
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            log_tail = f.read()[-4000:]
+        raise RuntimeError(f"{e}\nЖурнал процесса приложения:\n{log_tail}") from None
+    return process
+
+
+def print_report(stats, duration, workers):
+    total = sum(len(values) for values in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    print(f"\nДлительность: {duration:.1f} сек, запросов: {total}, "
+          f"пропускная способность: {total / duration:.1f} запр/сек, "
+          f"ошибок: {errors} ({errors / total * 100 if total else 0:.1f}%)")
+    print(f"\n{'Операция':<16}{'Кол-во':>8}{'Ошибки':>8}{'p50 мс':>10}{'p90 мс':>10}{'p99 мс':>10}{'max мс':>10}")
+    for operation, values in sorted(stats.latencies.items()):
+        print(f"{operation:<16}{len(values):>8}{stats.errors[operation]:>8}"
+              f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 90) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}{max(values) * 1000:>10.1f}")
+    if stats.failures:
+        print("\nПричины ошибок:")
+        for operation, reasons in sorted(stats.failures.items()):
+            details = ', '.join(f"{reason}: {count}" for reason, count in reasons.most_common())
+            print(f"{operation:<16}{details}")
+    print(f"\n{'Процесс':<16}{'PID':>8}{'RSS МБ':>10}{'Пик МБ':>10}")
+    for port, process in workers:
+        rss, peak = read_memory(process.pid)
+        print(f"{'worker:' + str(port):<16}{process.pid:>8}{rss:>10.1f}{peak:>10.1f}")
+
+
+def run_load(args):
+    stub_port = free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'stub', '--port', str(stub_port),
+         '--preview-kb', str(args.preview_kb), '--latency', str(args.stub_latency)],
+        cwd=BASE_DIR, stdout=subprocess.DEVNULL
+    )
+    workers = []
+    db_dir = tempfile.mkdtemp(prefix='music_quiz_load_')
+    try:
+        wait_ready(f"http://127.0.0.1:{stub_port}/ping", stub)
+        env = dict(os.environ)
+        env['DEEZER_API_URL'] = f"http://127.0.0.1:{stub_port}"
+        env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(db_dir, 'loadtest.db')}"
+        if not args.database_url and args.workers > 1:
+            print("ВНИМАНИЕ: все процессы приложения пишут в один файл SQLite. Блокировки базы "
+                  "искажают задержки и ошибки, результаты достоверны только для одного процесса. "
+                  "Для нескольких процессов укажите --database-url с PostgreSQL.")
+        # Запускаем процессы по очереди, чтобы create_all не выполнялся одновременно
+        for _ in range(args.workers):
+            port = free_port()
+            workers.append((port, start_worker(port, env, db_dir)))
+        print(f"Заглушка Deezer: {env['DEEZER_API_URL']}, процессов приложения: {len(workers)}, "
+              f"игроков: {args.players}, раундов: {args.rounds}")
+
+        stats = Stats()
+        players = [
+            Player(f"http://127.0.0.1:{workers[idx % len(workers)][0]}", stats, args)
+            for idx in range(args.players)
+        ]
+        threads = []
+        start = time.perf_counter()
+        for player in players:
+            thread = threading.Thread(target=player.run, daemon=True)
+            thread.start()
+            threads.append(thread)
+            if args.ramp_up:
+                time.sleep(args.ramp_up / args.players)
+        for thread in threads:
+            thread.join()
+        print_report(stats, time.perf_counter() - start, workers)
+    finally:
+        for _, process in workers:
+            process.terminate()
+        stub.terminate()
+        for _, process in workers:
+            process.wait()
+        stub.wait()
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def run_worker(args):
+    from app import app, socketio
+    socketio.run(app, host='127.0.0.1', port=args.port, log_output=False)
+
+
+def run_stub_server(args):
+    from utils.deezer_stub import run_stub
+    run_stub(port=args.port, preview_size=args.preview_kb * 1024, latency=args.latency / 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование Music Quiz')
+    parser.add_argument('--players', type=int, default=20, help='количество одновременных игроков')
+    parser.add_argument('--workers', type=int, default=1, help='количество процессов приложения')
+    parser.add_argument('--rounds', type=int, default=5, help='раундов игры на игрока')
+    parser.add_argument('--difficulties', nargs='+', default=['easy', 'medium', 'hard'],
+                        choices=['easy', 'medium', 'hard'])
+    parser.add_argument('--think', type=float, default=0.5, help='максимальная пауза игрока, сек')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='время подключения всех игроков, сек')
+    parser.add_argument('--timeout', type=float, default=30.0, help='таймаут запроса, сек')
+    parser.add_argument('--no-chat', dest='chat', action='store_false', help='не подключаться к чату')
+    parser.add_argument('--preview-kb', type=int, default=256, help='размер аудио превью заглушки, КБ')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='задержка ответа заглушки, мс')
+    parser.add_argument('--database-url', help='база данных приложения (по умолчанию временная SQLite)')
+    subparsers = parser.add_subparsers(dest='command')
+
+    worker_parser = subparsers.add_parser('worker', help='процесс приложения (запускается автоматически)')
+    worker_parser.add_argument('--port', type=int, required=True)
+
+    stub_parser = subparsers.add_parser('stub', help='заглушка Deezer API и CDN')
+    stub_parser.add_argument('--port', type=int, default=8001)
+    stub_parser.add_argument('--preview-kb', type=int, default=256)
+    stub_parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа, мс')
+
+    args = parser.parse_args()
+    if args.command == 'worker':
+        run_worker(args)
+    elif args.command == 'stub':
+        run_stub_server(args)
+    else:
+        run_load(args)
+
+
+if __name__ == '__main__':
+    main()
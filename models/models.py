@@ -1,28 +1,90 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.schema import CreateIndex
 from datetime import datetime
+from collections import namedtuple
+import time
 
 db = SQLAlchemy()
 
+# Время жизни кэша данных боковой панели (лидеры и последние сообщения), в секундах.
+# Кэш живёт в памяти каждого процесса и не сбрасывается при записи: данные устаревают не более чем на TTL
+SIDEBAR_CACHE_TTL = 5
+
+LeaderEntry = namedtuple('LeaderEntry', ['username', 'score'])
+MessageEntry = namedtuple('MessageEntry', ['username', 'message', 'timestamp'])
+
+_sidebar_cache = {}
+
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
-    score = db.Column(db.Integer, default=0)
+    score = db.Column(db.Integer, default=0, index=True)
 
 
 class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+def migrate_indexes():
+    # create_all не добавляет индексы в уже существующие таблицы, поэтому создаём их отдельно.
+    # IF NOT EXISTS не падает, если индекс одновременно создаёт другой процесс
+    for table in (User.__table__, Message.__table__):
+        for index in table.indexes:
+            db.session.execute(CreateIndex(index, if_not_exists=True))
+    db.session.commit()
+
+
+def get_sidebar_data(leaders_limit=5, messages_limit=3):
+    key = (leaders_limit, messages_limit)
+    cached = _sidebar_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    # Лидеры и последние сообщения одним запросом через UNION ALL
+    leaders_query = db.select(
+        db.literal('leader').label('kind'),
+        User.username.label('username'),
+        User.score.label('score'),
+        db.cast(db.null(), db.Text).label('message'),
+        db.cast(db.null(), db.DateTime).label('timestamp')
+    ).order_by(User.score.desc()).limit(leaders_limit).subquery()
+    messages_query = db.select(
+        db.literal('message').label('kind'),
+        Message.username.label('username'),
+        db.cast(db.null(), db.Integer).label('score'),
+        Message.message.label('message'),
+        Message.timestamp.label('timestamp')
+    ).order_by(Message.timestamp.desc()).limit(messages_limit).subquery()
+    rows = db.session.execute(
+        db.union_all(db.select(leaders_query), db.select(messages_query))
+    ).all()
+
+    leaders = sorted(
+        (LeaderEntry(row.username, row.score) for row in rows if row.kind == 'leader'),
+        key=lambda leader: leader.score or 0,
+        reverse=True
+    )
+    messages = sorted(
+        (MessageEntry(row.username, row.message, row.timestamp) for row in rows if row.kind == 'message'),
+        key=lambda message: message.timestamp,
+        reverse=True
+    )
+    data = (leaders, messages)
+    _sidebar_cache[key] = (time.monotonic() + SIDEBAR_CACHE_TTL, data)
+    return data
 
 
 def init_db(app):
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        migrate_indexes()
         if not Message.query.first():
             welcome_message = Message(
                 username='Система',
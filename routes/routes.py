@@ -1,8 +1,9 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response, Response
 from flask_login import login_user, login_required, logout_user, current_user
 from flask_socketio import emit
-from models.models import User, Message, db
+from models.models import User, Message, db, get_sidebar_data
 from utils.track_utils import select_track_and_options
+from utils.deezer import DEEZER_API_URL
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import requests
@@ -16,15 +17,14 @@ logger = logging.getLogger(__name__)
 def init_routes(app: Flask, socketio=None):
     def check_deezer_api():
         try:
-            response = requests.get("https://api.deezer.com/ping", timeout=5)
+            response = requests.get(f"{DEEZER_API_URL}/ping", timeout=5)
             return response.status_code == 200
         except requests.RequestException:
             return False
 
     @app.route('/')
     def index():
-        leaders = User.query.order_by(User.score.desc()).limit(5).all()
-        messages = Message.query.order_by(Message.timestamp.desc()).limit(3).all()
+        leaders, messages = get_sidebar_data()
         if 'selected_style' not in session:
             session['selected_style'] = 'any'
         logger.debug(f"Index: leaders = {[(leader.username, leader.score) for leader in leaders]}")
@@ -59,8 +59,7 @@ def init_routes(app: Flask, socketio=None):
             return redirect(url_for('index'))
 
         # Получаем лидеров и сообщения
-        leaders = User.query.order_by(User.score.desc()).limit(5).all()
-        messages = Message.query.order_by(Message.timestamp.desc()).limit(3).all()
+        leaders, messages = get_sidebar_data()
         logger.debug(f"Play: leaders = {[(leader.username, leader.score) for leader in leaders]}")
         logger.debug(f"Play: messages = {[(msg.username, msg.message) for msg in messages]}")
 
@@ -201,15 +200,14 @@ def init_routes(app: Flask, socketio=None):
 
     @app.route('/leaderboard')
     def leaderboard():
-        leaders = User.query.order_by(User.score.desc()).limit(10).all()
-        messages = Message.query.order_by(Message.timestamp.desc()).limit(3).all()
+        leaders, messages = get_sidebar_data(leaders_limit=10)
         logger.debug(f"Leaderboard: leaders = {[(leader.username, leader.score) for leader in leaders]}")
         return render_template('leaderboard.html', leaders=leaders, messages=messages)
 
     @app.route('/chat')
     @login_required
     def chat():
-        leaders = User.query.order_by(User.score.desc()).limit(5).all()
+        leaders, _ = get_sidebar_data()
         messages = Message.query.order_by(Message.timestamp.desc()).all()
         logger.debug(f"Chat: leaders = {[(leader.username, leader.score) for leader in leaders]}")
         return render_template('chat.html', messages=messages, leaders=leaders)
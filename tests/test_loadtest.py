@@ -0,0 +1,75 @@
+import json
+import threading
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from loadtest import Stats, percentile
+from utils.deezer_stub import make_server
+
+
+@pytest.fixture
+def stub():
+    server, base_url = make_server(preview_size=1024)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield base_url
+    server.shutdown()
+    server.server_close()
+
+
+def test_stub_top_tracks_have_fields_used_by_track_selection(stub):
+    with urllib.request.urlopen(f"{stub}/artist/27/top?limit=50") as response:
+        data = json.loads(response.read().decode('utf-8'))
+
+    assert len(data['data']) == 50
+    for track in data['data']:
+        assert track['preview'].startswith(f"{stub}/cdn/preview/")
+        assert str(track['rank']).isdigit()
+        assert track['id'] and track['title']
+
+
+@pytest.mark.parametrize('method', ['GET', 'HEAD'])
+def test_stub_serves_audio_previews(stub, method):
+    request = urllib.request.Request(f"{stub}/cdn/preview/27_0.mp3", method=method)
+    with urllib.request.urlopen(request) as response:
+        assert response.status == 200
+        assert 'audio' in response.headers['Content-Type']
+        assert response.headers['Content-Length'] == '1024'
+        assert len(response.read()) == (1024 if method == 'GET' else 0)
+
+
+def test_percentile():
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+    assert percentile([], 50) == 0.0
+    assert percentile(values, 0) == 0.1
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 99) == 0.5
+
+
+def response(status_code, text=''):
+    return SimpleNamespace(status_code=status_code, text=text)
+
+
+def fail(exception):
+    raise exception
+
+
+def test_stats_measure_records_failure_reasons():
+    stats = Stats()
+
+    ok = stats.measure('play', lambda: response(200, 'page'), expect=200, check=lambda r: r.text == 'page')
+    assert ok is not None
+    assert stats.measure('play', lambda: response(302), expect=200) is None
+    assert stats.measure('play', lambda: response(200, 'index'), expect=200, check=lambda r: r.text == 'page') is None
+    assert stats.measure('preload', lambda: response(503)) is None
+    assert stats.measure('preload', lambda: response(201)) is not None
+    assert stats.measure('proxy', fail, requests.Timeout()) is None
+
+    assert len(stats.latencies['play']) == 3
+    assert stats.errors == {'play': 2, 'preload': 1, 'proxy': 1}
+    assert stats.failures['play'] == {'HTTP 302': 1, 'content check': 1}
+    assert stats.failures['preload'] == {'HTTP 503': 1}
+    assert stats.failures['proxy'] == {'Timeout': 1}
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from models import models
+from models.models import User, Message, db, init_db, get_sidebar_data
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app)
+    models._sidebar_cache.clear()
+    with app.app_context():
+        yield app
+        db.drop_all()
+    models._sidebar_cache.clear()
+
+
+def test_get_sidebar_data_returns_sorted_leaders_and_messages(app):
+    db.session.add_all([
+        User(username='low', password='x', score=5),
+        User(username='high', password='x', score=30),
+        User(username='mid', password='x', score=15),
+    ])
+    # Позже приветственного сообщения, которое создаёт init_db
+    now = datetime.utcnow() + timedelta(hours=1)
+    for minutes in range(5):
+        db.session.add(Message(username='u', message=f"m{minutes}", timestamp=now - timedelta(minutes=minutes)))
+    db.session.commit()
+
+    leaders, messages = get_sidebar_data(leaders_limit=2, messages_limit=3)
+
+    assert [(leader.username, leader.score) for leader in leaders] == [('high', 30), ('mid', 15)]
+    assert [message.message for message in messages] == ['m0', 'm1', 'm2']
+    assert all(isinstance(message.timestamp, datetime) for message in messages)
+
+
+def index_names():
+    rows = db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+    return {row[0] for row in rows}
+
+
+def test_get_sidebar_data_is_cached_for_ttl(app, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(models.time, 'monotonic', lambda: clock[0])
+    db.session.add(User(username='player', password='x', score=10))
+    db.session.commit()
+
+    leaders, _ = get_sidebar_data()
+    assert [(leader.username, leader.score) for leader in leaders] == [('player', 10)]
+
+    db.session.get(User, 1).score = 50
+    db.session.add(Message(username='player', message='new', timestamp=datetime.utcnow() + timedelta(hours=1)))
+    db.session.commit()
+
+    clock[0] += models.SIDEBAR_CACHE_TTL - 1
+    leaders, messages = get_sidebar_data()
+    assert leaders[0].score == 10
+    assert 'new' not in [message.message for message in messages]
+
+    clock[0] += 2
+    leaders, messages = get_sidebar_data()
+    assert leaders[0].score == 50
+    assert messages[0].message == 'new'
+
+
+def test_migrate_indexes_restores_missing_indexes(app):
+    # Имитируем базу, созданную до появления индексов
+    db.session.execute(db.text('DROP INDEX ix_user_score'))
+    db.session.execute(db.text('DROP INDEX ix_message_timestamp'))
+    db.session.commit()
+    assert not {'ix_user_score', 'ix_message_timestamp'} & index_names()
+
+    models.migrate_indexes()
+    assert {'ix_user_score', 'ix_message_timestamp'} <= index_names()
+
+    models.migrate_indexes()
+    assert {'ix_user_score', 'ix_message_timestamp'} <= index_names()
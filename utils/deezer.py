@@ -3,6 +3,7 @@ from pathlib import Path
 import urllib.request
 import urllib.error
 import logging
+import os
 
 # Настройка логирования
 logging.basicConfig(filename='game.log', level=logging.DEBUG, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -10,6 +11,8 @@ logger = logging.getLogger(__name__)
 
 GENRES_DIR = Path("genres")
 ALL_ARTISTS_FILE = Path("artists_with_tracks.json")
+# Базовый адрес Deezer API (переопределяется для нагрузочного тестирования)
+DEEZER_API_URL = os.getenv("DEEZER_API_URL", "https://api.deezer.com").rstrip("/")
 
 def load_artists(genre=None):
     artists = []
@@ -77,7 +80,7 @@ def fetch(url):
         return None
 
 def get_artist_top_tracks(artist_id, limit=20):
-    url = f"https://api.deezer.com/artist/{artist_id}/top?limit={limit}"
+    url = f"{DEEZER_API_URL}/artist/{artist_id}/top?limit={limit}"
     logger.debug(f"Запрос топ-треков для artist_id={artist_id}: {url}")
     data = fetch(url)
     if not data:
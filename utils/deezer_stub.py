@@ -0,0 +1,80 @@
+import json
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Локальная заглушка Deezer API и CDN превью для нагрузочного тестирования
+
+
+def make_handler(base_url, preview_size=256 * 1024, latency=0.0):
+    preview_body = b'\xff\xfb\x90\x00' * (preview_size // 4)
+
+    class DeezerStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def send_json(self, data, status=200):
+            self.send_body(status, 'application/json', json.dumps(data).encode('utf-8'))
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            url = urlparse(self.path)
+            parts = url.path.strip('/').split('/')
+            if parts == ['ping']:
+                self.send_json({'status': 'ok'})
+            elif len(parts) == 3 and parts[0] == 'artist' and parts[2] == 'top':
+                limit = int(parse_qs(url.query).get('limit', ['20'])[0])
+                artist_id = parts[1]
+                tracks = [
+                    {
+                        'id': zlib.crc32(artist_id.encode('utf-8')) % 100000 * 1000 + idx,
+                        'title': f"Stub track {idx} ({artist_id})",
+                        'rank': 1000000 - idx * 1000,
+                        'preview': f"{base_url}/cdn/preview/{artist_id}_{idx}.mp3",
+                        'artist': {'id': artist_id, 'name': f"Stub artist {artist_id}"}
+                    }
+                    for idx in range(limit)
+                ]
+                self.send_json({'data': tracks, 'total': len(tracks)})
+            elif len(parts) == 3 and parts[:2] == ['cdn', 'preview']:
+                self.send_body(200, 'audio/mpeg', preview_body)
+            else:
+                self.send_json({'error': {'type': 'DataException', 'message': 'no data', 'code': 800}}, status=404)
+
+        def do_HEAD(self):
+            self.do_GET()
+
+    return DeezerStubHandler
+
+
+def make_server(host='127.0.0.1', port=0, preview_size=256 * 1024, latency=0.0):
+    # Адрес CDN в ссылках на превью известен только после привязки порта (port=0 выбирает свободный)
+    server = ThreadingHTTPServer((host, port), BaseHTTPRequestHandler)
+    server.daemon_threads = True
+    base_url = f"http://{host}:{server.server_address[1]}"
+    server.RequestHandlerClass = make_handler(base_url, preview_size, latency)
+    return server, base_url
+
+
+def run_stub(host='127.0.0.1', port=8001, preview_size=256 * 1024, latency=0.0):
+    server, base_url = make_server(host, port, preview_size, latency)
+    print(f"Заглушка Deezer запущена на {base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
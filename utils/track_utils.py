@@ -1,13 +1,13 @@
 import random
 import json
 import time
-from utils.deezer import load_artists
+from utils.deezer import load_artists, DEEZER_API_URL
 import urllib.request
 import urllib.error
 
 def fetch_track_with_preview(artist_id, difficulty):
     start_time = time.time()
-    url = f"https://api.deezer.com/artist/{artist_id}/top?limit=50"
+    url = f"{DEEZER_API_URL}/artist/{artist_id}/top?limit=50"
     print(f"[{difficulty.upper()}] Запрос топ-треков для artist_id={artist_id}: {url}")
     try:
         with urllib.request.urlopen(url) as response: